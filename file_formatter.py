@@ -6,11 +6,161 @@ Handles subtitles, removes unwanted files, and shows directory tree structure.
 """
 
 import argparse
+import collections
+import errno
+import functools
+import io
+import itertools
+import os
 import re
 import shutil
+import stat
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from enum import IntEnum
 from pathlib import Path
 from typing import List, Tuple, Optional
 
+# Release tags stripped from titles when they follow a ".", "-", "_" or space
+# separator. Resolutions (480p, 1080p, 2160p, ...) are matched by shape instead.
+RELEASE_LITERALS = (
+    "WEBRip", "BluRay", "BRRip", "HDRip", "DVDRip",
+    "x264", "x265", "HEVC",
+    "AAC5.1", "AAC.1", "AAC",
+    "YTS.MX", "YTS", "RARBG",
+)
+
+# Tree-view prefixes for directory structure display, indexed by is_last
+TREE_ITEM = ("├── ", "└── ")
+TREE_PAD = ("│   ", "    ")
+
+
+# Title cleanup patterns, compiled once at import.
+# Release tags to remove: any [...] block, plus separator-delimited tags
+_BRACKETS_RE = re.compile(r"\[[^\]]*\]")
+# Longest literals first so "YTS.MX" wins over "YTS" in the alternation
+_TAGS_RE = re.compile(
+    r"(?i)[.\-_\s](?:\d{3,4}p|"
+    + "|".join(re.escape(t) for t in sorted(RELEASE_LITERALS, key=len, reverse=True))
+    + r")\b"
+)
+_DOUBLE_OPEN_RE = re.compile(r"\s*\(\s*\(\s*")
+_DOUBLE_CLOSE_RE = re.compile(r"\s*\)\s*\)\s*")
+# Names already in "Title (Year)" form that parsing would leave unchanged:
+# single-spaced words free of separators, brackets and trim characters
+_FORMATTED_RE = re.compile(r"(?:[^\s()\[\]{}._-]+ )+\((?:19|20)\d{2}\)")
+# Used with match(), which anchors at the start; nothing after the year matters
+_YEAR_FULL_RE = re.compile(r"(.+?)\s*\(\s*((?:19|20)\d{2})\s*\)")
+_YEAR_TRUNC_RE = re.compile(r"(.+?)\s*\(\s*(19|20)\s*\)")
+# Dots and underscores used as word separators become spaces
+_CLEAN_TABLE = str.maketrans({".": " ", "_": " "})
+# Punctuation trimmed from both ends of a cleaned title
+_STRIP_CHARS = " .-_()[]{}"
+
+
+@functools.lru_cache(maxsize=4096)
+def parse_title_year(name: str) -> Optional[Tuple[str, str, Optional[str]]]:
+    """Parse a name without its extension into (title, year, truncated_prefix).
+
+    truncated_prefix is "19" or "20" when the year had to be guessed from a
+    two-digit "(19)"/"(20)", otherwise None. The title may come back empty.
+    Each top-level name is parsed twice, first to plan its target name and
+    then when the item runs a few dozen items later, so the second call is
+    served from the cache. Being cached, this must stay free of side effects.
+    """
+    # Handle malformed names like "Title ( (2007)" - fix the double parentheses issue.
+    # Most names have at most one of each, so count first and skip the regex.
+    if name.count("(") > 1:
+        name = _DOUBLE_OPEN_RE.sub(" (", name)  # Replace " ( (" with " ("
+    if name.count(")") > 1:
+        name = _DOUBLE_CLOSE_RE.sub(") ", name)  # Replace ") )" with ") "
+
+    # Both year patterns need a "(...)" pair; skip the regexes when there is none
+    if "(" not in name or ")" not in name:
+        return None
+
+    # Look for year pattern in parentheses: "Title (Year)" format
+    # First try to match 4-digit year
+    year_in_parens = _YEAR_FULL_RE.match(name)
+    if year_in_parens:
+        title = year_in_parens.group(1).strip()
+        year_full = year_in_parens.group(2)
+        return clean_title(title), year_full, None
+
+    # Handle truncated 2-digit years like "(19)" or "(20)"
+    if "19" not in name and "20" not in name:
+        return None
+    truncated_year = _YEAR_TRUNC_RE.match(name)
+    if truncated_year:
+        title = truncated_year.group(1).strip()
+        year_prefix = truncated_year.group(2)
+
+        # Try to guess the full year based on context
+        # For "19" assume 1990s, for "20" assume 2020s (most recent decade)
+        if year_prefix == "19":
+            year_full = "1999"  # Default to late 90s
+        else:  # year_prefix == "20"
+            year_full = "2020"  # Default to 2020s
+
+        return clean_title(title), year_full, year_prefix
+
+    return None
+
+
+def is_formatted(name: str) -> bool:
+    """Cheap check for a stem that parse_title_year would return as-is."""
+    # name[:-7] is the title without its " (YYYY)" suffix, which _FORMATTED_RE
+    # guarantees; the space before it lets a leading release-tag word be caught too
+    return _FORMATTED_RE.fullmatch(name) is not None and not _TAGS_RE.search(" " + name[:-7])
+
+
+def clean_title(title: str) -> str:
+    """Strip release tags and separator noise from a raw title."""
+    title = _BRACKETS_RE.sub("", title)
+    title = _TAGS_RE.sub("", title)
+    title = title.translate(_CLEAN_TABLE)
+    title = " ".join(title.split())  # Collapse whitespace runs and trim
+    return title.strip(_STRIP_CHARS)
+
+
+def clear_cache():
+    """Drop memoized parse_title_year results."""
+    parse_title_year.cache_clear()
+
+
+def _ext(name: str) -> str:
+    """Lowercase extension without the dot, with the same rules as Path.suffix."""
+    i = name.rfind(".")
+    return name[i + 1:].lower() if 0 < i < len(name) - 1 else ""
+
+
+def move_file(src: str, dst: str):
+    """Move a file with a single rename, copying only across filesystems."""
+    try:
+        os.replace(src, dst)
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+        shutil.move(src, dst)
+
+
+def check_directory(path) -> bool:
+    """Check that path is an existing directory with a single stat, reporting why not."""
+    try:
+        mode = os.stat(path).st_mode
+    except (FileNotFoundError, NotADirectoryError):
+        print(f"❌ Directory does not exist: {path}")
+        return False
+    except OSError as e:
+        print(f"❌ Cannot access directory: {e}")
+        return False
+
+    if not stat.S_ISDIR(mode):
+        print(f"❌ Path is not a directory: {path}")
+        return False
+    return True
+
 
 class Colors:
     """ANSI color codes for terminal output"""
@@ -25,365 +175,480 @@ class Colors:
     BOLD = '\033[1m'
 
 
+class NoColors(Colors):
+    """Empty color codes for output that isn't a terminal"""
+    RED = GREEN = YELLOW = BLUE = MAGENTA = CYAN = WHITE = RESET = BOLD = ''
+
+
+def terminal_colors():
+    """Return Colors for a terminal, NoColors when stdout is redirected."""
+    return Colors if sys.stdout.isatty() else NoColors
+
+
+class FileKind(IntEnum):
+    """What a file is, as classified by its extension"""
+    VIDEO = 0
+    SUBTITLE = 1
+    UNWANTED = 2
+
+
 class JellyfinFormatter:
     def __init__(self, dry_run: bool = False):
         self.dry_run = dry_run
+
+        # Per-thread output buffer so parallel items don't interleave their lines
+        self._output = threading.local()
+
+        # print_action lines, rendered once as %-templates (prefix, old[, new]);
+        # colors are dropped when output is redirected
+        self.colors = c = terminal_colors()
+        if dry_run:
+            self._delete_tpl = (
+                f"%s[DRY RUN] {c.RED}🗑️  Delete:{c.RESET} %s"
+                f"{c.RED} -> {c.RESET}{c.RED}DELETE{c.RESET}"
+            )
+            self._rename_tpl = (
+                f"%s[DRY RUN] {c.GREEN}📝 Rename:{c.RESET} %s"
+                f"{c.GREEN} -> {c.RESET}{c.GREEN}%s{c.RESET}"
+            )
+        else:
+            self._delete_tpl = "%s🗑️  Removed: %s"
+            self._rename_tpl = "%s📝 %s → %s"
         
-        # Video file extensions
+        # Video file extensions (lowercase, no leading dot; see _ext)
         self.video_extensions = {
-            ".mp4",
-            ".mkv",
-            ".avi",
-            ".mov",
-            ".wmv",
-            ".flv",
-            ".webm",
-            ".m4v",
+            "mp4",
+            "mkv",
+            "avi",
+            "mov",
+            "wmv",
+            "flv",
+            "webm",
+            "m4v",
         }
 
         # Subtitle file extensions
         self.subtitle_extensions = {
-            ".srt",
-            ".sub",
-            ".ass",
-            ".ssa",
-            ".vtt",
-            ".idx",
-            ".sup",
+            "srt",
+            "sub",
+            "ass",
+            "ssa",
+            "vtt",
+            "idx",
+            "sup",
         }
 
         # Files to remove
         self.unwanted_extensions = {
-            ".txt",
-            ".url",
-            ".lnk",
-            ".nfo",
-            ".jpg",
-            ".jpeg",
-            ".png",
-            ".gif",
-            ".bmp",
-            ".exe",
-            ".msi",
-            ".zip",
-            ".rar",
-            ".7z",
+            "txt",
+            "url",
+            "lnk",
+            "nfo",
+            "jpg",
+            "jpeg",
+            "png",
+            "gif",
+            "bmp",
+            "exe",
+            "msi",
+            "zip",
+            "rar",
+            "7z",
         }
 
-        # Common release group patterns to remove
-        self.release_patterns = [
-            r"\[.*?YTS.*?\]",
-            r"\[.*?RARBG.*?\]",
-            r"\[.*?1080p.*?\]",
-            r"\[.*?720p.*?\]",
-            r"\[.*?480p.*?\]",
-            r"\[.*?WEBRip.*?\]",
-            r"\[.*?BluRay.*?\]",
-            r"\[.*?BRRip.*?\]",
-            r"\[.*?HDRip.*?\]",
-            r"\[.*?DVDRip.*?\]",
-            r"\[.*?x264.*?\]",
-            r"\[.*?x265.*?\]",
-            r"\[.*?HEVC.*?\]",
-            r"\[.*?5\.1.*?\]",
-            r"\[.*?AAC.*?\]",
-            r"\.1080p\.",
-            r"\.720p\.",
-            r"\.480p\.",
-            r"\.WEBRip\.",
-            r"\.BluRay\.",
-            r"\.BRRip\.",
-            r"\.HDRip\.",
-            r"\.DVDRip\.",
-            r"\.x264\.",
-            r"\.x265\.",
-            r"\.HEVC\.",
-            r"\.AAC5?\.1",
-            r"-\[YTS\.MX\]",
-            r"-RARBG",
-            r"\.YTS\.MX",
-            r"\.RARBG",
-        ]
+        # Extension -> file kind, so each file is classified with one lookup
+        self._ext_class = {}
+        for kind, extensions in (
+            (FileKind.VIDEO, self.video_extensions),
+            (FileKind.SUBTITLE, self.subtitle_extensions),
+            (FileKind.UNWANTED, self.unwanted_extensions),
+        ):
+            self._ext_class.update(dict.fromkeys(extensions, kind))
+
+    def _print(self, text: str = ""):
+        """Print a line, or buffer it when called from a worker thread's item."""
+        buf = getattr(self._output, "buf", None)
+        if buf is None:
+            print(text)
+        else:
+            buf.write(text)
+            buf.write("\n")
 
     def print_action(self, prefix: str, old_name: str, new_name: str = None, action: str = "rename"):
         """Print an action with appropriate coloring"""
         if action == "delete":
-            arrow = f"{Colors.RED} -> {Colors.RESET}"
-            target = f"{Colors.RED}DELETE{Colors.RESET}"
-            action_text = f"{Colors.RED}🗑️  Delete:{Colors.RESET}"
+            self._print(self._delete_tpl % (prefix, old_name))
         else:  # rename/move
-            arrow = f"{Colors.GREEN} -> {Colors.RESET}"
-            target = f"{Colors.GREEN}{new_name}{Colors.RESET}"
-            action_text = f"{Colors.GREEN}📝 Rename:{Colors.RESET}"
-        
-        if self.dry_run:
-            print(f"{prefix}[DRY RUN] {action_text} {old_name}{arrow}{target}")
-        else:
-            if action == "delete":
-                print(f"{prefix}🗑️  Removed: {old_name}")
-            else:
-                print(f"{prefix}📝 {old_name} → {new_name}")
+            self._print(self._rename_tpl % (prefix, old_name, new_name))
 
     def extract_title_year(self, filename: str) -> Optional[Tuple[str, str]]:
-        """Extract title and year from filename."""
-        # Remove file extension
-        name = Path(filename).stem
-
-        # Handle malformed names like "Title ( (2007)" - fix the double parentheses issue
-        name = re.sub(r"\s*\(\s*\(\s*", " (", name)  # Replace " ( (" with " ("
-        name = re.sub(r"\s*\)\s*\)\s*", ") ", name)  # Replace ") )" with ") "
-
-        # Look for year pattern in parentheses: "Title (Year)" format
-        # First try to match 4-digit year
-        year_in_parens = re.search(r"^(.+?)\s*\(\s*((19|20)\d{2})\s*\).*$", name)
-        if year_in_parens:
-            title = year_in_parens.group(1).strip()
-            year_full = year_in_parens.group(2)
-            # Clean up title
-            for pattern in self.release_patterns:
-                title = re.sub(pattern, "", title, flags=re.IGNORECASE)
-            title = re.sub(r"[._]+", " ", title)
-            title = re.sub(r"\s+", " ", title).strip()
-            title = title.strip(" .-_()[]{}")
-            return (title, year_full) if title else None
-
-        # Handle truncated 2-digit years like "(19)" or "(20)"
-        truncated_year = re.search(r"^(.+?)\s*\(\s*(19|20)\s*\).*$", name)
-        if truncated_year:
-            title = truncated_year.group(1).strip()
-            year_prefix = truncated_year.group(2)
-
-            # Try to guess the full year based on context
-            # For "19" assume 1990s, for "20" assume 2020s (most recent decade)
-            if year_prefix == "19":
-                year_full = "1999"  # Default to late 90s
-            else:  # year_prefix == "20"
-                year_full = "2020"  # Default to 2020s
-
-            # Clean up title
-            for pattern in self.release_patterns:
-                title = re.sub(pattern, "", title, flags=re.IGNORECASE)
-            title = re.sub(r"[._]+", " ", title)
-            title = re.sub(r"\s+", " ", title).strip()
-            title = title.strip(" .-_()[]{}")
-
+        """Extract title and year from a file or folder basename."""
+        # Remove file extension (same rule as Path.stem)
+        i = filename.rfind(".")
+        parsed = parse_title_year(filename[:i] if 0 < i < len(filename) - 1 else filename)
+        if not parsed:
+            return None
+
+        title, year_full, year_prefix = parsed
+        if year_prefix:
             warning_msg = f"    ⚠️  Found truncated year ({year_prefix}) - using {year_full} as default"
             if self.dry_run:
-                print(f"[DRY RUN] {warning_msg}")
+                self._print(f"[DRY RUN] {warning_msg}")
             else:
-                print(warning_msg)
-            return (title, year_full) if title else None
-
-    def format_name(self, title: str, year: str) -> str:
-        """Format title and year to Jellyfin standard."""
-        return f"{title} ({year})"
-
-    def get_tree_prefix(self, is_last: bool, is_item: bool = True) -> str:
-        """Get the tree prefix for directory structure display."""
-        if is_item:
-            return "└── " if is_last else "├── "
-        else:
-            return "    " if is_last else "│   "
-
-    def remove_unwanted_files(self, directory: Path) -> List[str]:
-        """Remove unwanted files from directory."""
+                self._print(warning_msg)
+        return (title, year_full) if title else None
+
+    def _iter_files(self, root: str):
+        """Yield a DirEntry for every file below root, without following symlinked dirs."""
+        stack = [root]
+        while stack:
+            try:
+                it = os.scandir(stack.pop())
+            except PermissionError:
+                continue
+            with it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif entry.is_file():
+                        yield entry
+
+    def _classify(self, folder: str) -> Tuple[list, list, list]:
+        """Scan a movie folder once, binning files into (videos, subtitles, unwanted).
+
+        Videos and subtitles only come from the folder itself; unwanted files
+        are collected from the whole tree below it.
+        """
+        videos, subs, unwanted = [], [], []
+        subdirs = []
+        ext_class = self._ext_class
+        bins = {FileKind.VIDEO: videos, FileKind.SUBTITLE: subs, FileKind.UNWANTED: unwanted}
+
+        with os.scandir(folder) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.append(entry.path)
+                    continue
+                if not entry.is_file():
+                    continue
+
+                # Unknown extensions have no kind, and None has no bin
+                found = bins.get(ext_class.get(_ext(entry.name)))
+                if found is not None:
+                    found.append(entry)
+
+        for subdir in subdirs:
+            for entry in self._iter_files(subdir):
+                if ext_class.get(_ext(entry.name)) == FileKind.UNWANTED:
+                    unwanted.append(entry)
+
+        return videos, subs, unwanted
+
+    def remove_unwanted_files(self, unwanted: list) -> List[str]:
+        """Remove the unwanted files found by _classify."""
         removed_files = []
 
-        for file_path in directory.rglob("*"):
-            if (
-                file_path.is_file()
-                and file_path.suffix.lower() in self.unwanted_extensions
-            ):
-                removed_files.append(str(file_path))
-                self.print_action("    ", file_path.name, action="delete")
-                
-                if not self.dry_run:
-                    try:
-                        file_path.unlink()
-                    except Exception as e:
-                        print(f"    ❌ Error removing {file_path.name}: {e}")
+        # _classify yields entries directory by directory. Where supported, open
+        # each directory once and unlink relative to it, so the kernel doesn't
+        # re-resolve the full path for every file.
+        use_dir_fd = not self.dry_run and os.unlink in os.supports_dir_fd
+        for parent, entries in itertools.groupby(
+            unwanted, key=lambda e: os.path.dirname(e.path)
+        ):
+            dir_fd = None
+            if use_dir_fd:
+                try:
+                    dir_fd = os.open(parent, os.O_RDONLY | os.O_DIRECTORY)
+                except OSError:
+                    pass
+            try:
+                for entry in entries:
+                    removed_files.append(entry.path)
+                    self.print_action("    ", entry.name, action="delete")
+                    
+                    if not self.dry_run:
+                        try:
+                            if dir_fd is None:
+                                os.unlink(entry.path)
+                            else:
+                                os.unlink(entry.name, dir_fd=dir_fd)
+                        except Exception as e:
+                            self._print(f"    ❌ Error removing {entry.name}: {e}")
+            finally:
+                if dir_fd is not None:
+                    os.close(dir_fd)
 
         return removed_files
 
-    def organize_subtitles(self, movie_dir: Path, movie_name: str):
-        """Organize subtitle files in movie directory."""
-        subtitle_files = []
-
-        # Find all subtitle files
-        for file_path in movie_dir.iterdir():
-            if (
-                file_path.is_file()
-                and file_path.suffix.lower() in self.subtitle_extensions
-            ):
-                subtitle_files.append(file_path)
+    def organize_subtitles(self, movie_dir: str, movie_name: str, subtitle_files: list):
+        """Organize the subtitle files found by _classify in movie directory.
 
+        Every entry has a subtitle extension, so its suffix starts at name.rfind(".").
+        """
         if not subtitle_files:
             return
 
+        # scandir order is filesystem-dependent; sort so the same subtitle is
+        # always picked as the main one
+        subtitle_files = sorted(subtitle_files, key=lambda e: (e.name.lower(), e.name))
+
         # Create Subs folder if needed and there are multiple subtitle files
         if len(subtitle_files) > 1:
-            subs_dir = movie_dir / "Subs"
+            subs_dir = os.path.join(movie_dir, "Subs")
             
             if self.dry_run:
-                print(f"    [DRY RUN] 📁 Create directory: Subs/")
+                self._print(f"    [DRY RUN] 📁 Create directory: Subs/")
             else:
-                subs_dir.mkdir(exist_ok=True)
+                os.makedirs(subs_dir, exist_ok=True)
 
             # Move additional subtitles to Subs folder
             for i, sub_file in enumerate(subtitle_files[1:], 1):
-                new_name = f"{movie_name}.{sub_file.suffix}"
+                suffix = sub_file.name[sub_file.name.rfind("."):]
+                new_name = f"{movie_name}.{suffix}"
                 if i > 1:
-                    new_name = f"{movie_name}.{i}{sub_file.suffix}"
+                    new_name = f"{movie_name}.{i}{suffix}"
 
-                new_path = subs_dir / new_name
+                new_path = os.path.join(subs_dir, new_name)
                 self.print_action("    ", f"{sub_file.name}", f"Subs/{new_name}", "move")
                 
                 if not self.dry_run:
                     try:
-                        shutil.move(str(sub_file), str(new_path))
+                        move_file(sub_file.path, new_path)
                     except Exception as e:
-                        print(f"    ❌ Error moving subtitle: {e}")
+                        self._print(f"    ❌ Error moving subtitle: {e}")
 
         # Rename the main subtitle file to match movie name
         if subtitle_files:
             main_sub = subtitle_files[0]
-            new_sub_name = f"{movie_name}{main_sub.suffix}"
-            new_sub_path = movie_dir / new_sub_name
+            new_sub_name = movie_name + main_sub.name[main_sub.name.rfind("."):]
 
             if main_sub.name != new_sub_name:
                 self.print_action("    ", main_sub.name, new_sub_name)
                 
                 if not self.dry_run:
                     try:
-                        main_sub.rename(new_sub_path)
+                        os.rename(main_sub.path, os.path.join(movie_dir, new_sub_name))
                     except Exception as e:
-                        print(f"    ❌ Error renaming subtitle: {e}")
+                        self._print(f"    ❌ Error renaming subtitle: {e}")
 
     def process_directory(self, base_path: Path):
         """Process the entire directory structure."""
-        if not base_path.exists():
-            print(f"❌ Directory does not exist: {base_path}")
+        if not check_directory(base_path):
             return
 
-        mode_text = f"{Colors.CYAN}[DRY RUN MODE]{Colors.RESET}" if self.dry_run else ""
-        print(f"\n🎬 Processing Jellyfin Media Directory: {base_path} {mode_text}")
-        print("=" * 60)
-
-        # Get all items to process
-        items = list(base_path.iterdir())
-        items.sort(key=lambda x: (x.is_file(), x.name.lower()))
-
-        for i, item_path in enumerate(items):
-            is_last = i == len(items) - 1
-
-            if item_path.is_file():
-                self.process_file(item_path, is_last)
-            elif item_path.is_dir():
-                self.process_folder(item_path, is_last)
-
-    def process_file(self, file_path: Path, is_last: bool = False):
+        c = self.colors
+        mode_text = f"{c.CYAN}[DRY RUN MODE]{c.RESET}" if self.dry_run else ""
+        sys.stdout.write(
+            f"\n🎬 Processing Jellyfin Media Directory: {base_path} {mode_text}\n"
+            + "=" * 60 + "\n"
+        )
+
+        # Get all items to process, folders first then by name. Only the top
+        # level is held in memory; folder contents are scanned as each item runs.
+        # Sort keys are computed once per entry; names are unique, so ties
+        # never reach the entry.
+        with os.scandir(base_path) as it:
+            decorated = [(e.is_file(), e.name.lower(), e.name, e) for e in it]
+        decorated.sort()
+
+        last = len(decorated) - 1
+
+        # Items are independent and mostly waiting on filesystem calls, so run
+        # them in threads and write each item's buffered output in tree order.
+        # Only a bounded window is in flight, so finished output streams out
+        # instead of piling up behind a slow item.
+        # Items that end up with the same name would race to claim it (rename
+        # silently replaces files), so each one waits for the previous item
+        # with that target and they still run in tree order. Targets are
+        # compared case-insensitively to cover case-insensitive filesystems.
+        workers = min(32, (os.cpu_count() or 1) * 4)
+        pending = collections.deque()
+        claims = {}
+        executor = ThreadPoolExecutor(max_workers=workers)
+        try:
+            for i, (_, _, _, entry) in enumerate(decorated):
+                target = self._target_name(entry).lower()
+                done = threading.Event()
+                future = executor.submit(self._process_item, entry, i == last, claims.get(target))
+                # Set on cancellation too, so a waiter never blocks on an item that won't run
+                future.add_done_callback(lambda _, done=done: done.set())
+                claims[target] = done
+                pending.append(future)
+                if len(pending) >= 2 * workers:
+                    sys.stdout.write(pending[0].result())
+                    pending.popleft()
+            while pending:
+                sys.stdout.write(pending[0].result())
+                pending.popleft()
+        except BaseException:
+            # Ctrl-C or a failure: drop queued items that haven't started, wait
+            # for running ones, and still report every change that was made.
+            # Cancelling by hand rather than with shutdown(cancel_futures=True)
+            # keeps this working before Python 3.9.
+            for future in pending:
+                future.cancel()
+            executor.shutdown(wait=True)
+            for future in pending:
+                if not future.cancelled() and future.exception() is None:
+                    sys.stdout.write(future.result())
+            raise
+        executor.shutdown()
+
+    def _target_name(self, entry: os.DirEntry) -> str:
+        """Name a top-level item will have once processed, worked out without printing."""
+        name = entry.name
+        is_file = entry.is_file()
+        if is_file and self._ext_class.get(_ext(name)) != FileKind.VIDEO:
+            return name
+
+        # Mirrors the checks in process_file and process_folder, with the
+        # same stem rule as extract_title_year
+        i = name.rfind(".")
+        stem = name[:i] if 0 < i < len(name) - 1 else name
+        if is_formatted(stem if is_file else name):
+            return name
+        parsed = parse_title_year(stem)
+        if not parsed or not parsed[0]:
+            return name
+
+        formatted_name = f"{parsed[0]} ({parsed[1]})"
+        return formatted_name + name[i:] if is_file else formatted_name
+
+    def _process_item(
+        self, entry: os.DirEntry, is_last: bool, after: Optional[threading.Event] = None
+    ) -> str:
+        """Process one top-level file or folder and return its output.
+
+        When after is given, wait for it first; it is set once the previous
+        item with the same target name has finished. Errors are reported in
+        the item's output rather than raised, so a failing item never hides
+        what the other items already changed.
+        """
+        if after is not None:
+            after.wait()
+        self._output.buf = buf = io.StringIO()
+        try:
+            try:
+                if entry.is_file():
+                    self.process_file(entry.path, is_last)
+                elif entry.is_dir():
+                    self.process_folder(entry.path, is_last)
+            except Exception as e:
+                self._print(f"{TREE_PAD[is_last]}❌ Error processing {entry.name}: {e}")
+            return buf.getvalue()
+        finally:
+            self._output.buf = None
+
+    def process_file(self, file_path: str, is_last: bool = False):
         """Process a single file."""
-        prefix = self.get_tree_prefix(is_last)
+        prefix = TREE_ITEM[is_last]
+        parent, name = os.path.split(file_path)
 
         # Skip if not a video file
-        if file_path.suffix.lower() not in self.video_extensions:
+        if self._ext_class.get(_ext(name)) != FileKind.VIDEO:
+            return
+
+        # Already "Title (Year).ext": nothing to parse or rename
+        if is_formatted(name[:name.rfind(".")]):
+            self._print(f"{prefix}✅ {name} (already formatted)")
             return
 
         # Extract title and year
-        title_year = self.extract_title_year(file_path.name)
+        title_year = self.extract_title_year(name)
         if not title_year:
-            print(f"{prefix}⚠️  Could not extract year: {file_path.name}")
+            self._print(f"{prefix}⚠️  Could not extract year: {name}")
             return
 
         title, year = title_year
-        formatted_name = self.format_name(title, year)
-        new_name = f"{formatted_name}{file_path.suffix}"
-        new_path = file_path.parent / new_name
+        formatted_name = f"{title} ({year})"  # Jellyfin standard
+        new_name = formatted_name + name[name.rfind("."):]
 
-        if file_path.name != new_name:
-            self.print_action(prefix, file_path.name, new_name)
+        if name != new_name:
+            self.print_action(prefix, name, new_name)
             
             if not self.dry_run:
                 try:
-                    file_path.rename(new_path)
+                    os.rename(file_path, os.path.join(parent, new_name))
                 except Exception as e:
-                    print(f"{prefix}❌ Error renaming file: {e}")
+                    self._print(f"{prefix}❌ Error renaming file: {e}")
         else:
-            print(f"{prefix}✅ {file_path.name} (already formatted)")
+            self._print(f"{prefix}✅ {name} (already formatted)")
 
-    def process_folder(self, folder_path: Path, is_last: bool = False):
+    def process_folder(self, folder_path: str, is_last: bool = False):
         """Process a folder and its contents."""
-        prefix = self.get_tree_prefix(is_last)
+        prefix = TREE_ITEM[is_last]
+        parent, name = os.path.split(folder_path)
+
+        # Already "Title (Year)": skip parsing and go straight to the contents
+        if is_formatted(name):
+            self._print(f"{prefix}📁 {name} (already formatted)")
+            self.process_folder_contents(folder_path, is_last, name)
+            return
 
         # Extract title and year from folder name
-        title_year = self.extract_title_year(folder_path.name)
+        title_year = self.extract_title_year(name)
         if not title_year:
-            print(f"{prefix}📁 {folder_path.name} (no year found)")
-            self.process_folder_contents(folder_path, is_last, folder_path.name)
+            self._print(f"{prefix}📁 {name} (no year found)")
+            self.process_folder_contents(folder_path, is_last, name)
             return
 
         title, year = title_year
-        formatted_name = self.format_name(title, year)
-        new_folder_path = folder_path.parent / formatted_name
+        formatted_name = f"{title} ({year})"  # Jellyfin standard
 
         # Rename folder if needed
-        if folder_path.name != formatted_name:
-            self.print_action(prefix, folder_path.name, formatted_name)
+        if name != formatted_name:
+            self.print_action(prefix, name, formatted_name)
             
             if not self.dry_run:
                 try:
-                    folder_path.rename(new_folder_path)
+                    new_folder_path = os.path.join(parent, formatted_name)
+                    os.rename(folder_path, new_folder_path)
                     folder_path = new_folder_path
                 except Exception as e:
-                    print(f"{prefix}❌ Error renaming folder: {e}")
+                    self._print(f"{prefix}❌ Error renaming folder: {e}")
                     return
             # In dry run mode, keep using the original folder_path since it still exists
         else:
-            print(f"{prefix}📁 {folder_path.name} (already formatted)")
+            self._print(f"{prefix}📁 {name} (already formatted)")
 
         # Process folder contents (use original folder_path in dry run, new path if actually renamed)
         self.process_folder_contents(folder_path, is_last, formatted_name)
 
     def process_folder_contents(
-        self, folder_path: Path, is_last_folder: bool, folder_name: str
+        self, folder_path: str, is_last_folder: bool, folder_name: str
     ):
         """Process contents of a folder."""
-        # Remove unwanted files first
-        removed = self.remove_unwanted_files(folder_path)
+        video_files, subtitle_files, unwanted = self._classify(folder_path)
 
-        # Find video files
-        video_files = []
-        for file_path in folder_path.iterdir():
-            if (
-                file_path.is_file()
-                and file_path.suffix.lower() in self.video_extensions
-            ):
-                video_files.append(file_path)
+        # Remove unwanted files first
+        removed = self.remove_unwanted_files(unwanted)
 
         # Process video files
+        pad = TREE_PAD[is_last_folder]
+        item_prefixes = (pad + TREE_ITEM[False], pad + TREE_ITEM[True])
+        last = len(video_files) - 1
         for i, video_file in enumerate(video_files):
-            is_last_item = i == len(video_files) - 1
-            child_prefix = "    " if is_last_folder else "│   "
-            item_prefix = child_prefix + self.get_tree_prefix(is_last_item)
+            item_prefix = item_prefixes[i == last]
 
-            # Rename video file to match folder name
-            new_video_name = f"{folder_name}{video_file.suffix}"
-            new_video_path = video_file.parent / new_video_name
+            # Rename video file to match folder name; _classify only keeps
+            # names with an extension, so rfind always finds its dot
+            old_name = video_file.name
+            new_video_name = folder_name + old_name[old_name.rfind("."):]
 
-            if video_file.name != new_video_name:
-                self.print_action(item_prefix, video_file.name, new_video_name)
+            if old_name != new_video_name:
+                self.print_action(item_prefix, old_name, new_video_name)
                 
                 if not self.dry_run:
                     try:
-                        video_file.rename(new_video_path)
+                        os.rename(video_file.path, os.path.join(folder_path, new_video_name))
                     except Exception as e:
-                        print(f"{item_prefix}❌ Error renaming video: {e}")
+                        self._print(f"{item_prefix}❌ Error renaming video: {e}")
             else:
-                print(f"{item_prefix}✅ {video_file.name} (already formatted)")
+                self._print(f"{item_prefix}✅ {old_name} (already formatted)")
 
         # Organize subtitles
         if video_files:
-            self.organize_subtitles(folder_path, folder_name)
+            self.organize_subtitles(folder_path, folder_name, subtitle_files)
 
 
 def main():
@@ -412,6 +677,7 @@ Examples:
     )
     
     args = parser.parse_args()
+    colors = terminal_colors()
     
     print("🎬 Jellyfin Media Formatter")
     print("=" * 30)
@@ -439,18 +705,13 @@ Examples:
             break
 
     # Validate directory
-    if not directory_path.exists():
-        print(f"❌ Directory does not exist: {directory_path}")
-        return
-
-    if not directory_path.is_dir():
-        print(f"❌ Path is not a directory: {directory_path}")
+    if not check_directory(directory_path):
         return
 
     # Show dry run status
     if args.dry_run:
         print(f"\n📂 Directory to process: {directory_path}")
-        print(f"{Colors.CYAN}🔍 DRY RUN MODE: No files will be modified{Colors.RESET}")
+        print(f"{colors.CYAN}🔍 DRY RUN MODE: No files will be modified{colors.RESET}")
         print()
     else:
         # Confirm before processing in normal mode
@@ -466,7 +727,7 @@ Examples:
     formatter.process_directory(directory_path)
 
     if args.dry_run:
-        print(f"\n{Colors.CYAN}🔍 DRY RUN COMPLETED!{Colors.RESET}")
+        print(f"\n{colors.CYAN}🔍 DRY RUN COMPLETED!{colors.RESET}")
         print("No files were actually modified. Run without --dry-run to apply changes.")
     else:
         print("\n✅ Processing completed!")